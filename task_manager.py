@@ -1,4 +1,33 @@
+import atexit
 import json
+import mmap
+import os
+import signal
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_ON_DISK = {"path": None, "mtime": None}
+_LAST_DUMP = {"path": None, "bytes": None}
+_FLUSH_EVERY = 16
+_STREAM_THRESHOLD = 10_000
+_MMAP_THRESHOLD = 4096
+_MISSING = object()
+
+_PROMPT = """
+What do you want to do?
+    l - list tasks
+    c - change status of a task
+    a - add task
+    r - remove task
+    e - end program
+"""
+_CONFIRM_PROMPT = "Are you sure? (y/n) "
+_EXIT = object()
 
 
 def validate_input(input):
@@ -11,226 +40,411 @@ def validate_input(input):
     Returns:
         bool: True if the input is a non-empty string, False otherwise.
     """
-    if type(input) == str and bool(input.strip()):
-        return True
-    else:
-        return False
+    return isinstance(input, str) and bool(input) and not input.isspace()
 
 
 def load_tasks(file_path):
     """
     Loads tasks from a JSON file.
 
+    The file's modification time is recorded so dump_tasks can tell whether the
+    file changed since. With orjson, files of at least _MMAP_THRESHOLD bytes are
+    parsed straight from a memory map. Files with non-lowercase task names or
+    non-boolean statuses are rewritten once with lowercased names and statuses
+    converted to booleans.
+
     Args:
         file_path (str): The path to the JSON file containing tasks.
 
     Returns:
         dict: A dictionary with task names as keys and their completion status as values.
+
+    Raises:
+        json.JSONDecodeError: If the file is not valid JSON or does not contain an object.
     """
-    with open(file_path, "r") as f:
-        tasks = json.load(f)
+    stat = os.stat(file_path)
+
+    with open(file_path, "rb") as f:
+        if orjson and stat.st_size >= _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as data:
+                    tasks = orjson.loads(data)
+        else:
+            data = f.read()
 
-    tasks = {task.lower(): tasks[task] for task in tasks}
+            if orjson:
+                tasks = orjson.loads(data)
+            else:
+                try:
+                    tasks = json.loads(data)
+                except UnicodeDecodeError as e:
+                    raise json.JSONDecodeError(str(e), "", 0) from e
+
+    if not isinstance(tasks, dict):
+        raise json.JSONDecodeError("Tasks file must contain a JSON object", "", 0)
+
+    if any(
+        task != task.lower() or type(done) is not bool for task, done in tasks.items()
+    ):
+        tasks = {task.lower(): bool(done) for task, done in tasks.items()}
+        dump_tasks(file_path, tasks)
+        return tasks
+
+    _ON_DISK.update(path=file_path, mtime=stat.st_mtime_ns)
 
     return tasks
 
 
-def dump_tasks(file_path, tasks):
+def _stream_tasks(file_path, tasks):
     """
-    Writes tasks to a JSON file.
+    Writes non-empty tasks to a JSON file one entry at a time.
+
+    The output has the same two-space indented layout as the in-memory dump.
 
     Args:
         file_path (str): The path to the JSON file.
         tasks (dict): A dictionary with task names as keys and their completion status as values.
     """
-    with open(file_path, "w") as f:
-        json.dump(tasks, f, indent=2)
+    with open(file_path, "wb") as f:
+        f.write(b"{")
+        separator = b"\n  "
 
+        for task, done in tasks.items():
+            key = orjson.dumps(task) if orjson else json.dumps(task).encode()
+            f.write(separator + key + (b": true" if done else b": false"))
+            separator = b",\n  "
 
-def list_tasks(tasks):
+        f.write(b"\n}")
+
+
+def dump_tasks(file_path, tasks):
     """
-    Prints all tasks with their completion status.
+    Writes tasks to a JSON file and records its new modification time.
+
+    Nothing is written if the serialized tasks match what is already on disk. At
+    least _STREAM_THRESHOLD tasks are streamed to the file entry by entry instead
+    of being serialized in memory first.
 
     Args:
+        file_path (str): The path to the JSON file.
         tasks (dict): A dictionary with task names as keys and their completion status as values.
     """
-    if len(tasks) == 0:
-        print("No tasks added.")
-        return
-
-    for task in tasks:
-        if tasks[task]:
-            print("-", task, "✅")
+    if len(tasks) >= _STREAM_THRESHOLD:
+        blob = None
+        _stream_tasks(file_path, tasks)
+    else:
+        if orjson:
+            blob = orjson.dumps(tasks, option=orjson.OPT_INDENT_2)
         else:
-            print("-", task, "❌")
+            blob = json.dumps(tasks, indent=2).encode()
+
+        try:
+            unchanged = (
+                _LAST_DUMP["path"] == file_path
+                and _LAST_DUMP["bytes"] == blob
+                and _ON_DISK["path"] == file_path
+                and _ON_DISK["mtime"] == os.stat(file_path).st_mtime_ns
+            )
+        except FileNotFoundError:
+            unchanged = False
+
+        if not unchanged:
+            with open(file_path, "wb") as f:
+                f.write(blob)
+
+    _ON_DISK.update(path=file_path, mtime=os.stat(file_path).st_mtime_ns)
+    _LAST_DUMP.update(path=file_path, bytes=blob)
 
 
-def add_task(file_path, tasks, name):
+class TaskStore:
     """
-    Adds a new task to the tasks list.
+    Holds the tasks of a single JSON file and writes changes back in batches.
 
-    Args:
-        file_path (str): The path to the JSON file.
+    Attributes:
+        path (str): The path to the JSON file.
         tasks (dict): A dictionary with task names as keys and their completion status as values.
-        name (str): The name of the new task.
-
-    Raises:
-        ValueError: If the task already exists or if the input is invalid.
+        dirty (bool): Whether tasks have changes that were not written yet.
+        mutations (int): The number of changes since tasks were last written.
     """
-    name = name.lower()
 
-    if validate_input(name) and (name.lower() not in tasks):
-        tasks.update({name: False})
-    else:
-        print("Task already exists.")
-        return
+    __slots__ = ("path", "tasks", "dirty", "mutations")
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The path to the JSON file.
+        """
+        self.path = path
+        self.tasks = {}
+        self.dirty = False
+        self.mutations = 0
+
+    def load(self):
+        """
+        Loads tasks from the JSON file.
+        """
+        self.tasks = load_tasks(self.path)
+
+    def flush(self):
+        """
+        Writes tasks to the JSON file if they have unsaved changes.
+        """
+        if not self.dirty:
+            return
+
+        dump_tasks(self.path, self.tasks)
+
+        self.dirty = False
+        self.mutations = 0
+
+    def _changed(self):
+        """
+        Marks tasks as modified, flushing them every _FLUSH_EVERY changes.
+        """
+        self.dirty = True
+        self.mutations += 1
+
+        if self.mutations >= _FLUSH_EVERY:
+            self.flush()
+
+    def list(self):
+        """
+        Prints all tasks with their completion status.
+        """
+        tasks = self.tasks
+
+        if len(tasks) == 0:
+            print("No tasks added.")
+            return
+
+        lines = (
+            f"- {task} {'✅' if done else '❌'}\n" for task, done in tasks.items()
+        )
+        sys.stdout.write("".join(lines))
+
+    def add(self, name):
+        """
+        Adds a new task to the tasks list.
+
+        Args:
+            name (str): The name of the new task.
+        """
+        tasks = self.tasks
+        name = name.lower()
+
+        if not validate_input(name) or name in tasks:
+            print("Task already exists.")
+            return
+
+        tasks[name] = False
+
+        self._changed()
+
+        print("Task was added.")
+
+    def remove(self, name):
+        """
+        Removes a task from the tasks list.
+
+        Args:
+            name (str): The name of the task to remove.
+
+        Raises:
+            TypeError: If the input is invalid.
+            ValueError: If the task does not exist.
+        """
+        if not validate_input(name):
+            raise TypeError
+
+        if self.tasks.pop(name.lower(), _MISSING) is _MISSING:
+            raise ValueError
+
+        self._changed()
+
+        print("Task removed.")
+
+    def toggle(self, name):
+        """
+        Toggles the completion status of a task.
+
+        Args:
+            name (str): The name of the task to toggle.
+
+        Raises:
+            TypeError: If the input is invalid.
+            ValueError: If the task does not exist.
+        """
+        if not validate_input(name):
+            raise TypeError
 
-    dump_tasks(file_path, tasks)
+        tasks = self.tasks
+        name = name.lower()
+        completed = tasks.get(name, _MISSING)
 
-    print("Task was added.")
+        if completed is _MISSING:
+            raise ValueError
 
+        completed = not completed
+        tasks[name] = completed
 
-def remove_task(file_path, tasks, name):
+        self._changed()
+
+        if completed:
+            print("Task changed to completed.")
+        else:
+            print("Task changed to uncompleted.")
+
+
+def _do_list(store):
     """
-    Removes a task from the tasks list.
+    Prints the current tasks.
 
     Args:
-        file_path (str): The path to the JSON file.
-        tasks (dict): A dictionary with task names as keys and their completion status as values.
-        name (str): The name of the task to remove.
+        store (TaskStore): The store holding the tasks.
+    """
+    print("CURRENT TASKS:")
+    store.list()
 
-    Raises:
-        TypeError: If the input is invalid.
-        ValueError: If the task does not exist.
+
+def _do_change(store):
     """
-    if not validate_input(name):
-        raise TypeError
+    Asks for a task name and toggles its completion status.
 
-    prev_length = len(tasks)
-    name = name.lower()
+    Args:
+        store (TaskStore): The store holding the tasks.
+    """
+    task_name = input("Name of the task to change the status of: ")
+    store.toggle(task_name)
 
-    if name in tasks:
-        del tasks[name]
 
-    new_length = len(tasks)
+def _do_add(store):
+    """
+    Asks for a task name and adds it as a new task.
 
-    if prev_length == new_length:
-        raise ValueError
+    Args:
+        store (TaskStore): The store holding the tasks.
+    """
+    task_name = input("Name of a new task: ")
+    store.add(task_name)
 
-    dump_tasks(file_path, tasks)
 
-    print("Task removed.")
+def _do_remove(store):
+    """
+    Asks for a task name and removes the task after confirmation.
+
+    Args:
+        store (TaskStore): The store holding the tasks.
+    """
+    task_name = input("Name of the task to remove: ")
+    sure = input(_CONFIRM_PROMPT)
+    if sure.lower() == "y":
+        store.remove(task_name)
 
 
-def change_complete(file_path, tasks, name):
+def _do_end(store):
     """
-    Toggles the completion status of a task.
+    Writes unsaved tasks and ends the program after confirmation.
 
     Args:
-        file_path (str): The path to the JSON file.
-        tasks (dict): A dictionary with task names as keys and their completion status as values.
-        name (str): The name of the task to toggle.
+        store (TaskStore): The store holding the tasks.
 
-    Raises:
-        TypeError: If the input is invalid.
-        ValueError: If the task does not exist.
+    Returns:
+        object: _EXIT if the user confirmed, None otherwise.
     """
-    if not validate_input(name):
-        raise TypeError
+    end = input(_CONFIRM_PROMPT)
+    if end.lower() == "y":
+        store.flush()
+        return _EXIT
 
-    found = False
-    completed = False
-    name = name.lower()
 
-    if name in tasks:
-        found = True
-        tasks[name] = not tasks[name]
-        if tasks[name]:
-            completed = True
+_ACTIONS = {
+    "l": _do_list,
+    "c": _do_change,
+    "a": _do_add,
+    "r": _do_remove,
+    "e": _do_end,
+}
 
-    if not found:
-        raise ValueError
 
-    dump_tasks(file_path, tasks)
+def _exit_on_signal(signum, frame):
+    """
+    Exits on a termination signal so the atexit handlers flush unsaved tasks.
 
-    if completed:
-        print("Task changed to completed.")
-    else:
-        print("Task changed to uncompleted.")
+    Args:
+        signum (int): The number of the received signal.
+        frame (frame): The interrupted stack frame.
+    """
+    sys.exit(128 + signum)
+
+
+def _run_once(store):
+    """
+    Processes user actions until the user ends the program.
+
+    Args:
+        store (TaskStore): The store holding the tasks.
+    """
+    while True:
+        handler = _ACTIONS.get(input(_PROMPT).lower())
+
+        if handler is None:
+            print("Wrong letter provided.")
+            continue
+
+        if handler(store) is _EXIT:
+            break
 
 
 def run(file_path):
     """
     Runs the main task management loop.
 
+    A missing or malformed tasks file is reset before the loop starts. Errors caused
+    by user input are reported and the loop continues until the user ends the
+    program or input runs out.
+
     Args:
         file_path (str): The path to the JSON file.
     """
-    try:
-        while True:
-            tasks = load_tasks(file_path)
-
-            action = input(
-                """
-                What do you want to do?
-                    l - list tasks
-                    c - change status of a task
-                    a - add task
-                    r - remove task
-                    e - end program
-                """
-            ).lower()
-
-            match action:
-                case "l":
-                    print("CURRENT TASKS:")
-                    list_tasks(tasks)
-                case "c":
-                    task_name = input("Name of the task to change the status of: ")
-                    change_complete(file_path, tasks, task_name)
-                case "a":
-                    task_name = input("Name of a new task: ")
-                    add_task(file_path, tasks, task_name)
-                case "r":
-                    task_name = input("Name of the task to remove: ")
-                    sure = input("Are you sure? (y/n) ")
-                    if sure.lower() == "y":
-                        remove_task(file_path, tasks, task_name)
-                    else:
-                        continue
-                case "e":
-                    end = input("Are you sure? (y/n) ")
-                    if end.lower() == "y":
-                        break
-                    else:
-                        continue
-                case _:
-                    print("Wrong letter provided.")
-
-    except FileNotFoundError:
-        dump_tasks(file_path, {})
-        print("New tasks file was created. Try again.")
-        run(file_path)
-
-    except json.JSONDecodeError:
-        dump_tasks(file_path, {})
-        print(
-            "There was something wrong with the tasks file. Tasks were reset. Try again."
-        )
-        run(file_path)
+    store = TaskStore(file_path)
+    atexit.register(store.flush)
+
+    for name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), _exit_on_signal)
+
+    while True:
+        try:
+            store.load()
+            break
+
+        except FileNotFoundError:
+            dump_tasks(file_path, {})
+            print("New tasks file was created. Try again.")
+
+        except json.JSONDecodeError:
+            dump_tasks(file_path, {})
+            print(
+                "There was something wrong with the tasks file. Tasks were reset. Try again."
+            )
+
+    while True:
+        try:
+            _run_once(store)
+            return
+
+        except EOFError:
+            return
 
-    except TypeError:
-        print("Task name must be a unique, non-empty string.")
-        run(file_path)
+        except TypeError:
+            print("Task name must be a unique, non-empty string.")
 
-    except ValueError:
-        print("Task not in tasks list.")
-        run(file_path)
+        except ValueError:
+            print("Task not in tasks list.")
 
-    except Exception as e:
-        print("Something went wrong. Try again.")
-        print("Error code:", str(e))
-        run(file_path)
+        except Exception as e:
+            print("Something went wrong. Try again.")
+            print("Error code:", str(e))
 
 
 run("tasks.json")